@@ -1,17 +1,31 @@
 # External dependencies
 import requests  # version 2.25.1 - Make HTTP requests to the AI image generation API.
 import json  # built-in module - Parse and handle JSON data from API responses.
+import argparse  # built-in module - Parse command line options for the batch CLI.
+import sys  # built-in module - Stream batch input and output over stdin/stdout.
+import tracemalloc  # built-in module - Check that per-stage peak memory can be measured.
+import tempfile  # built-in module - Spool the review queue of a batch to disk.
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED  # built-in module - Run batch items concurrently.
 
 # Internal dependencies
 from configs.settings import AI_IMAGE_API_KEY, LOG_LEVEL, CONTENT_MODERATION_THRESHOLD  # Access configuration settings.
 from utils.logger import setup_logger  # Set up logging for monitoring activities.
 from utils.image_processor import process_image  # Process images to ensure they meet app requirements.
+from utils.image_processor import build_contact_sheets, review_thumbnail_path  # Review queue contact sheets.
 from services.ai_image_generator import generate_image  # Generate AI-based images using external AI services.
 from services.content_moderation import moderate_image  # Evaluate AI-generated images to ensure they meet content standards.
+from utils.profiling import StageProfiler  # Opt-in cProfile and tracemalloc hooks per pipeline stage.
 
 # Initialize the logger with the specified log level from settings.
 logger = setup_logger(LOG_LEVEL)
 
+# Pipeline stages available to the batch CLI, in the order they run.
+BATCH_STAGES = ('generate', 'process', 'moderate', 'save')
+
+# Stages run by the batch CLI when --stages is not given.
+# 'process' is left out because generate_image already processes the image it generates.
+DEFAULT_BATCH_STAGES = ('generate', 'moderate', 'save')
+
 def main():
     """
     Orchestrates the AI image generation and content moderation processes.
@@ -106,5 +120,237 @@ def save_image(image_data):
     # to the appropriate storage system or database.
     pass
 
+def run_batch_item(item, stages, profiler):
+    """
+    Runs one batch item through the selected pipeline stages.
+
+    Parameters:
+        item (dict): Batch input with a 'prompt', or an 'image_path' when 'generate' is not selected.
+        stages (tuple): Names of the pipeline stages to run, in BATCH_STAGES order.
+        profiler (StageProfiler): Profiler wrapping each stage.
+
+    Returns:
+        dict: Result with the item 'id', its 'status' and any stage outputs or 'error'.
+    """
+    result = {'id': item.get('id'), 'status': 'ok'}
+    image_path = item.get('image_path')
+    stage = None
+
+    try:
+        for stage in stages:
+            with profiler.stage(stage):
+                if stage == 'generate':
+                    image_path = generate_image(item['prompt'])
+                elif stage == 'process':
+                    image_path = process_image(image_path)
+                elif stage == 'moderate':
+                    result['approved'] = bool(moderate_image(image_path))
+                elif stage == 'save':
+                    # Only images approved by the moderate stage are ever saved (TR-2.3)
+                    if result.get('approved', False):
+                        save_image(image_path)
+                        result['saved'] = True
+                    else:
+                        result['saved'] = False
+
+        result['image_path'] = image_path
+    except Exception as e:
+        logger.error(f"Batch item {result['id']} failed during stage '{stage}': {str(e)}")
+        result.update(status='error', stage=stage, error=str(e))
+
+    return result
+
+def read_batch_items(lines):
+    """
+    Lazily parses JSONL batch input, one item per non-empty line.
+
+    Lines that are a bare JSON string are treated as a prompt. Items without an 'id'
+    are given their line number so results can be matched to the input.
+
+    Parameters:
+        lines (iterable): Lines of JSONL input.
+
+    Yields:
+        tuple: (line number, item dict or None, error message or None).
+    """
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {str(e)}"
+            continue
+        if isinstance(item, str):
+            item = {'prompt': item}
+        if not isinstance(item, dict):
+            yield line_number, None, "Each line must be a JSON object or a prompt string."
+            continue
+        item.setdefault('id', line_number)
+        yield line_number, item, None
+
+def run_batch(argv=None):
+    """
+    Batch CLI entry point that streams prompts from JSONL and writes per-item results as JSONL.
+
+    Input is read one line at a time and at most twice --concurrency items are in flight,
+    so memory use stays bounded regardless of the input size. Each result is written and
+    flushed as soon as its item finishes, which means results follow completion order.
+    With a concurrency of 1 items run on the calling thread, so stage profiles are not
+    mixed with reading input and writing results.
+
+    With --contact-sheets, the review thumbnails of items awaiting human review (approved by
+    the moderate stage, or every processed item when moderation is not selected) are spooled
+    to a temporary file and built into contact sheets for the admin approval queue once the
+    batch is done.
+
+    Parameters:
+        argv (list): Options following the 'batch' command, defaults to sys.argv[1:].
+
+    Returns:
+        int: Exit code, 0 if every item succeeded and 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(
+        prog='main.py batch', description="Run the AI image pipeline over a JSONL batch of prompts.")
+    parser.add_argument('--input', default='-',
+                        help="JSONL file with one prompt per line, or '-' for stdin (default).")
+    parser.add_argument('--output', default='-',
+                        help="File to write JSONL results to, or '-' for stdout (default).")
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help="Number of items processed in parallel (default: 1).")
+    parser.add_argument('--stages', default=','.join(DEFAULT_BATCH_STAGES),
+                        help=f"Comma separated pipeline stages from {', '.join(BATCH_STAGES)} "
+                             f"(default: {','.join(DEFAULT_BATCH_STAGES)}).")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="Write cProfile statistics to PATH (pstats format, convertible to a flamegraph).")
+    parser.add_argument('--tracemalloc', metavar='N', type=int, nargs='?', const=10, default=0,
+                        help="Log peak memory and the top N sites of net retained memory growth "
+                             "per stage (default N: 10).")
+    parser.add_argument('--contact-sheets', metavar='DIR',
+                        help="Build review contact sheets and their manifest in DIR for items "
+                             "awaiting human review.")
+    args = parser.parse_args(argv)
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1.")
+    selected = {stage.strip() for stage in args.stages.split(',') if stage.strip()}
+    unknown = selected - set(BATCH_STAGES)
+    if unknown or not selected:
+        parser.error(f"--stages must be a non-empty list of {', '.join(BATCH_STAGES)}.")
+    stages = tuple(stage for stage in BATCH_STAGES if stage in selected)
+    if 'save' in stages and 'moderate' not in stages:
+        parser.error("--stages must include 'moderate' when 'save' is selected, only approved images are saved.")
+    if args.tracemalloc and not hasattr(tracemalloc, 'reset_peak'):
+        parser.error("--tracemalloc requires Python 3.9 or higher.")
+    if args.tracemalloc and args.concurrency > 1:
+        parser.error("--tracemalloc requires --concurrency 1, memory use cannot be attributed to overlapping stages.")
+
+    profiler = StageProfiler(profile_path=args.profile, tracemalloc_top=args.tracemalloc)
+    try:
+        input_file = sys.stdin if args.input == '-' else open(args.input)
+    except OSError as e:
+        parser.error(f"cannot open --input: {e}")
+    try:
+        output_file = sys.stdout if args.output == '-' else open(args.output, 'w')
+    except OSError as e:
+        if input_file is not sys.stdin:
+            input_file.close()
+        parser.error(f"cannot open --output: {e}")
+    # Review queue entries go to disk so memory stays bounded for large batches
+    review_queue = tempfile.TemporaryFile('w+') if args.contact_sheets else None
+    failures = 0
+
+    def write_result(result):
+        nonlocal failures
+        if result['status'] != 'ok':
+            failures += 1
+        elif review_queue and result.get('approved', 'moderate' not in stages):
+            review_queue.write(json.dumps([result['id'], review_thumbnail_path(result['image_path'])]) + '\n')
+        output_file.write(json.dumps(result) + '\n')
+        output_file.flush()
+
+    logger.info(f"Starting batch run with stages {','.join(stages)} and concurrency {args.concurrency}.")
+    profiler.start()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            pending = set()
+            for line_number, item, error in read_batch_items(input_file):
+                if error:
+                    logger.error(f"Skipping batch input line {line_number}: {error}")
+                    write_result({'id': line_number, 'status': 'error', 'stage': 'input', 'error': error})
+                    continue
+                if 'generate' in stages and 'prompt' not in item:
+                    error = "Missing 'prompt' for the generate stage."
+                elif 'generate' not in stages and 'image_path' not in item:
+                    error = "Missing 'image_path' when the generate stage is not selected."
+                if error:
+                    write_result({'id': item['id'], 'status': 'error', 'stage': 'input', 'error': error})
+                    continue
+
+                # Run items inline so stage profiles only contain the stage's own work
+                if args.concurrency == 1:
+                    write_result(run_batch_item(item, stages, profiler))
+                    continue
+
+                # Bound the number of in-flight items so large inputs are never buffered in memory
+                if len(pending) >= args.concurrency * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write_result(future.result())
+                pending.add(executor.submit(run_batch_item, item, stages, profiler))
+
+            for future in wait(pending).done:
+                write_result(future.result())
+
+        if review_queue:
+            review_queue.seek(0)
+            thumbnails = (tuple(json.loads(line)) for line in review_queue)
+            try:
+                with profiler.stage('contact_sheets'):
+                    pages = build_contact_sheets(thumbnails, args.contact_sheets)
+                logger.info(f"Built {len(pages)} contact sheet page(s) in {args.contact_sheets}.")
+            except Exception as e:
+                logger.error(f"Failed to build contact sheets in {args.contact_sheets}: {str(e)}")
+                failures += 1
+    finally:
+        profiler.finish(logger)
+        if review_queue:
+            review_queue.close()
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    logger.info(f"Batch run completed with {failures} failed item(s).")
+    return 1 if failures else 0
+
+def cli(argv=None):
+    """
+    Command line entry point.
+
+    'main.py batch [options]' runs the JSONL batch CLI (see run_batch), while 'main.py'
+    without a command runs the single fixed generation (see main).
+
+    Parameters:
+        argv (list): Command line arguments, defaults to sys.argv[1:].
+
+    Returns:
+        int: Exit code.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ['batch']:
+        return run_batch(argv[1:])
+
+    parser = argparse.ArgumentParser(
+        prog='main.py', description="AI image generation and content moderation pipeline.",
+        epilog="Run 'main.py batch --help' for the batch options.")
+    parser.add_argument('command', nargs='?', choices=('batch',),
+                        help="Run the pipeline over a JSONL batch of prompts. "
+                             "Without a command, runs a single fixed generation.")
+    parser.parse_args(argv)
+    main()
+    return 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(cli())
\ No newline at end of file
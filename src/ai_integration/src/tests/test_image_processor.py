@@ -0,0 +1,155 @@
+"""
+Test suite for the review thumbnails and contact sheets produced by the image processor for
+the admin image approval queue.
+
+Like main.py, these tests import 'utils' as a top-level package, so they run from the
+src/ai_integration/src directory:
+
+    python -m unittest tests.test_image_processor
+"""
+
+# External imports (built-in modules)
+import json  # Built-in module for reading contact sheet indexes and manifests
+import os  # Built-in module for building temporary file paths
+import tempfile  # Built-in module for temporary image files
+import unittest  # Built-in unittest framework for writing and running tests
+
+# External imports
+from PIL import Image  # Version 8.2.0 - Create sample images and inspect outputs
+
+# Internal imports
+from utils.image_processor import (  # Functions under test
+    CONTACT_SHEET_MANIFEST,
+    build_contact_sheets,
+    process_image,
+    review_thumbnail_path,
+)
+from utils.logger import setup_logger  # Function to set up logging for test outputs
+
+# Set up logging for test outputs
+logger = setup_logger('DEBUG')
+
+
+class TestReviewImages(unittest.TestCase):
+    """
+    Test cases for review thumbnails and contact sheets.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def make_thumbnails(self, count):
+        """
+        Creates sample review thumbnails.
+
+        Returns:
+            list: (image_id, thumbnail_path) pairs.
+        """
+        thumbnails = []
+        for number in range(count):
+            thumbnail_path = os.path.join(self.temp_dir.name, f'thumb_{number}.jpeg')
+            Image.new('RGB', (160, 120), color='red').save(thumbnail_path)
+            thumbnails.append((f'image-{number}', thumbnail_path))
+        return thumbnails
+
+    def read_json(self, path):
+        with open(path) as json_file:
+            return json.load(json_file)
+
+    def test_process_image_creates_review_thumbnail(self):
+        """
+        Test that process_image also saves a small review thumbnail next to the processed image.
+
+        Steps:
+        1. Create a sample image file for testing.
+        2. Call the process_image function with the sample image path.
+        3. Assert that the review thumbnail exists and fits the review thumbnail size.
+        """
+        sample_image_path = os.path.join(self.temp_dir.name, 'sample_image.png')
+        Image.new('RGB', (1024, 1024), color='blue').save(sample_image_path)
+
+        processed_image_path = process_image(sample_image_path)
+
+        thumbnail_path = review_thumbnail_path(processed_image_path)
+        self.assertTrue(os.path.exists(thumbnail_path), "The review thumbnail should exist.")
+        with Image.open(thumbnail_path) as thumb:
+            self.assertEqual(thumb.format, 'JPEG', "The review thumbnail format should be JPEG.")
+            self.assertLessEqual(thumb.width, 160, "The review thumbnail should be at most 160 pixels wide.")
+            self.assertLessEqual(thumb.height, 120, "The review thumbnail should be at most 120 pixels high.")
+
+    def test_process_image_survives_thumbnail_failure(self):
+        """
+        Test that a failure to save the review thumbnail does not fail process_image.
+        """
+        sample_image_path = os.path.join(self.temp_dir.name, 'sample_image.png')
+        Image.new('RGB', (1024, 1024), color='blue').save(sample_image_path)
+
+        # Occupy the thumbnail path with a directory so saving the thumbnail fails
+        os.makedirs(review_thumbnail_path(os.path.join(self.temp_dir.name, 'sample_image_processed.jpeg')))
+
+        processed_image_path = process_image(sample_image_path)
+        self.assertTrue(os.path.exists(processed_image_path), "The processed image should still be saved.")
+
+    def test_build_contact_sheets(self):
+        """
+        Test that build_contact_sheets paginates thumbnails, indexes every tile by image id and
+        lists the pages in the manifest.
+
+        Steps:
+        1. Create sample thumbnails for more images than fit on one page.
+        2. Call build_contact_sheets with a small grid.
+        3. Assert that the expected pages are written and the indexes map tiles to image ids.
+        4. Assert that the manifest lists the pages.
+        """
+        output_dir = os.path.join(self.temp_dir.name, 'sheets')
+
+        pages = build_contact_sheets(self.make_thumbnails(5), output_dir, columns=2, rows=2)
+
+        self.assertEqual([page['page'] for page in pages], [1, 2], "Five tiles on a 2x2 grid should need two pages.")
+        first_index = self.read_json(pages[0]['index_path'])
+        last_index = self.read_json(pages[1]['index_path'])
+        self.assertEqual([tile['image_id'] for tile in first_index['tiles']], ['image-0', 'image-1', 'image-2', 'image-3'])
+        self.assertEqual(first_index['tiles'][3]['box'], [160, 120, 320, 240])
+        self.assertEqual([tile['image_id'] for tile in last_index['tiles']], ['image-4'])
+        with Image.open(pages[1]['sheet_path']) as sheet:
+            self.assertEqual(sheet.size, (320, 120), "The last page should only be as tall as the rows it uses.")
+
+        manifest = self.read_json(os.path.join(output_dir, CONTACT_SHEET_MANIFEST))
+        self.assertEqual(manifest['pages'], [
+            {'page': 1, 'sheet': 'contact_sheet_0001.jpeg', 'index': 'contact_sheet_0001.json', 'tiles': 4},
+            {'page': 2, 'sheet': 'contact_sheet_0002.jpeg', 'index': 'contact_sheet_0002.json', 'tiles': 1},
+        ])
+
+    def test_build_contact_sheets_removes_stale_pages(self):
+        """
+        Test that pages left by an earlier, longer run are removed and dropped from the manifest.
+        """
+        output_dir = os.path.join(self.temp_dir.name, 'sheets')
+        build_contact_sheets(self.make_thumbnails(5), output_dir, columns=2, rows=2)
+
+        build_contact_sheets(self.make_thumbnails(3), output_dir, columns=2, rows=2)
+
+        self.assertEqual(sorted(os.listdir(output_dir)), [
+            'contact_sheet_0001.jpeg', 'contact_sheet_0001.json', CONTACT_SHEET_MANIFEST])
+        manifest = self.read_json(os.path.join(output_dir, CONTACT_SHEET_MANIFEST))
+        self.assertEqual([page['page'] for page in manifest['pages']], [1])
+
+    def test_build_contact_sheets_missing_thumbnail(self):
+        """
+        Test that a missing thumbnail becomes a placeholder tile marked as missing, instead of
+        aborting the build.
+        """
+        output_dir = os.path.join(self.temp_dir.name, 'sheets')
+        thumbnails = self.make_thumbnails(1) + [('image-missing', os.path.join(self.temp_dir.name, 'nope.jpeg'))]
+
+        pages = build_contact_sheets(thumbnails, output_dir, columns=2, rows=2)
+
+        tiles = self.read_json(pages[0]['index_path'])['tiles']
+        self.assertNotIn('missing', tiles[0])
+        self.assertEqual(tiles[1], {
+            'image_id': 'image-missing', 'row': 0, 'column': 1, 'box': [160, 0, 320, 120], 'missing': True})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,312 @@
+"""
+Test suite for the batch CLI in the main orchestration script, ensuring JSONL batches are
+parsed, validated, processed and profiled correctly.
+
+main.py imports 'configs', 'services' and 'utils' as top-level packages, so these tests run
+from the src/ai_integration/src directory, like main.py itself:
+
+    python -m unittest tests.test_main
+
+This module addresses the following requirement:
+- AI-Generated Images and Content Moderation
+  - Location: TECHNICAL REQUIREMENTS/Feature 2: AI-Generated Images
+  - Description: Only images approved by the content moderation pipeline are saved (TR-2.3).
+"""
+
+# External imports (built-in modules)
+import json  # Built-in module for reading JSONL results
+import os  # Built-in module for building temporary file paths
+import sys  # Built-in module for isolating main from the AI service modules
+import pstats  # Built-in module for loading cProfile output
+import tempfile  # Built-in module for temporary batch files
+import threading  # Built-in module for the in-flight bound test
+import time  # Built-in module for slowing down mocked stages
+import unittest  # Built-in unittest framework for writing and running tests
+from unittest import mock  # Built-in module for mocking dependencies
+
+# Internal imports
+# main imports the AI services at module level, but their own imports do not resolve in this
+# layout yet (content_moderation also needs analyze_image_content, which does not exist).
+# Every test patches them, so stand-ins are registered only while main is imported.
+with mock.patch.dict(sys.modules, {
+    'services.ai_image_generator': mock.MagicMock(generate_image=None),
+    'services.content_moderation': mock.MagicMock(moderate_image=None),
+}):
+    import main  # Batch CLI functions under test
+    from utils.profiling import StageProfiler  # Per-stage profiling hooks
+    from utils.logger import setup_logger  # Function to set up logging for test outputs
+
+# Set up logging for test outputs
+logger = setup_logger('DEBUG')
+
+
+class TestBatchCLI(unittest.TestCase):
+    """
+    Test cases for the streaming JSONL batch CLI in main.py.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.output_path = os.path.join(self.temp_dir.name, 'results.jsonl')
+
+        # Patch the pipeline services so no API calls or image files are needed
+        patchers = {
+            'generate_image': mock.patch.object(main, 'generate_image', side_effect=lambda prompt: f"/images/{prompt}.jpeg"),
+            'moderate_image': mock.patch.object(main, 'moderate_image', side_effect=lambda path: 'unsafe' not in path),
+            'save_image': mock.patch.object(main, 'save_image'),
+        }
+        for name, patcher in patchers.items():
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def run_batch_lines(self, lines, *args):
+        """
+        Runs the batch CLI over the given input lines.
+
+        Returns:
+            tuple: The exit code and the list of JSONL results.
+        """
+        input_path = os.path.join(self.temp_dir.name, 'prompts.jsonl')
+        with open(input_path, 'w') as input_file:
+            input_file.write('\n'.join(lines) + '\n')
+
+        exit_code = main.run_batch(['--input', input_path, '--output', self.output_path, *args])
+        with open(self.output_path) as output_file:
+            return exit_code, [json.loads(line) for line in output_file]
+
+    def test_read_batch_items(self):
+        """
+        Test that read_batch_items parses prompt strings and objects, reports bad lines and
+        defaults ids to line numbers.
+        """
+        lines = ['"a red ball"', '', '[1, 2]', 'not json', '{"prompt": "a cat"}', '{"id": "dog", "prompt": "a dog"}']
+
+        parsed = list(main.read_batch_items(lines))
+
+        self.assertEqual(parsed[0], (1, {'id': 1, 'prompt': 'a red ball'}, None))
+        self.assertEqual(parsed[1][:2], (3, None))
+        self.assertIn('JSON object', parsed[1][2])
+        self.assertEqual(parsed[2][:2], (4, None))
+        self.assertIn('Invalid JSON', parsed[2][2])
+        self.assertEqual(parsed[3], (5, {'id': 5, 'prompt': 'a cat'}, None))
+        self.assertEqual(parsed[4], (6, {'id': 'dog', 'prompt': 'a dog'}, None))
+
+    def test_cli_batch_command(self):
+        """
+        Test that the 'batch' command runs the batch CLI with its defaults, and that other
+        arguments never silently fall back to the single fixed generation.
+        """
+        with mock.patch.object(main, 'main') as single_run:
+            with mock.patch.object(main.sys, 'stdin', ['"a cat"']):
+                exit_code = main.cli(['batch', '--output', self.output_path])
+            self.assertEqual(exit_code, 0)
+            with open(self.output_path) as output_file:
+                self.assertEqual(json.loads(output_file.readline())['image_path'], '/images/a cat.jpeg')
+
+            with self.assertRaises(SystemExit):
+                main.cli(['--input', 'prompts.jsonl'])
+            single_run.assert_not_called()
+
+            self.assertEqual(main.cli([]), 0)
+            single_run.assert_called_once_with()
+
+    def test_batch_unopenable_files(self):
+        """
+        Test that unopenable input or output files are usage errors, not tracebacks.
+        """
+        missing_path = os.path.join(self.temp_dir.name, 'missing', 'file.jsonl')
+        with self.assertRaises(SystemExit):
+            main.run_batch(['--input', missing_path, '--output', self.output_path])
+        with self.assertRaises(SystemExit):
+            self.run_batch_lines(['"a cat"'], '--output', missing_path)
+        self.generate_image.assert_not_called()
+
+    def test_batch_contact_sheets(self):
+        """
+        Test that --contact-sheets builds contact sheets from the thumbnails of approved items only.
+        """
+        sheets_dir = os.path.join(self.temp_dir.name, 'sheets')
+        queued = []
+
+        def collect_thumbnails(thumbnails, output_dir):
+            queued.extend(thumbnails)
+            return [{'page': 1}]
+
+        with mock.patch.object(main, 'build_contact_sheets', side_effect=collect_thumbnails) as build:
+            exit_code, _ = self.run_batch_lines(
+                ['"a cat"', '"an unsafe cat"', '{"id": "dog", "prompt": "a dog"}'], '--contact-sheets', sheets_dir)
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(build.call_args[0][1], sheets_dir)
+        self.assertEqual(queued, [(1, '/images/a cat_thumb.jpeg'), ('dog', '/images/a dog_thumb.jpeg')])
+
+    def test_batch_contact_sheets_failure(self):
+        """
+        Test that a failure to build contact sheets is reported through the exit code.
+        """
+        sheets_dir = os.path.join(self.temp_dir.name, 'sheets')
+        with mock.patch.object(main, 'build_contact_sheets', side_effect=OSError('disk full')):
+            exit_code, results = self.run_batch_lines(['"a cat"'], '--contact-sheets', sheets_dir)
+
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(results[0]['status'], 'ok')
+
+    def test_batch_success(self):
+        """
+        Test that approved images are saved, rejected ones are not, and the exit code is 0.
+        """
+        exit_code, results = self.run_batch_lines(['"a cat"', '"an unsafe cat"'])
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(results, [
+            {'id': 1, 'status': 'ok', 'approved': True, 'saved': True, 'image_path': '/images/a cat.jpeg'},
+            {'id': 2, 'status': 'ok', 'approved': False, 'saved': False, 'image_path': '/images/an unsafe cat.jpeg'},
+        ])
+        self.save_image.assert_called_once_with('/images/a cat.jpeg')
+
+    def test_batch_input_validation(self):
+        """
+        Test that items missing a 'prompt' or 'image_path' get input error results.
+        """
+        exit_code, results = self.run_batch_lines(['{"image_path": "/images/a.jpeg"}'])
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(results[0]['stage'], 'input')
+        self.assertIn("'prompt'", results[0]['error'])
+
+        exit_code, results = self.run_batch_lines(['"a cat"'], '--stages', 'moderate,save')
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(results[0]['stage'], 'input')
+        self.assertIn("'image_path'", results[0]['error'])
+        self.generate_image.assert_not_called()
+
+    def test_batch_save_requires_moderate(self):
+        """
+        Test that selecting 'save' without 'moderate' is rejected, so unmoderated images are never saved.
+        """
+        with self.assertRaises(SystemExit):
+            self.run_batch_lines(['"a cat"'], '--stages', 'generate,save')
+        self.save_image.assert_not_called()
+
+    def test_batch_item_error(self):
+        """
+        Test that a failing stage produces an error result for that item only and exit code 1.
+        """
+        def failing_generate(prompt):
+            if prompt == 'broken':
+                raise RuntimeError('API down')
+            return f"/images/{prompt}.jpeg"
+
+        self.generate_image.side_effect = failing_generate
+
+        exit_code, results = self.run_batch_lines(['"broken"', '"a cat"', 'not json'])
+
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(results[0], {'id': 1, 'status': 'error', 'stage': 'generate', 'error': 'API down'})
+        self.assertEqual(results[1]['status'], 'ok')
+        self.assertEqual(results[2]['status'], 'error')
+        self.assertEqual(results[2]['stage'], 'input')
+
+    def test_batch_in_flight_bound(self):
+        """
+        Test that at most twice --concurrency items are read ahead while stages are blocked.
+        """
+        concurrency = 2
+        release = threading.Event()
+        started = threading.Semaphore(0)
+        lines_read = []
+
+        def blocking_generate(prompt):
+            started.release()
+            release.wait(5)
+            return f"/images/{prompt}.jpeg"
+
+        def input_lines():
+            for number in range(20):
+                lines_read.append(number)
+                yield json.dumps(f"prompt {number}")
+
+        self.generate_image.side_effect = blocking_generate
+        with mock.patch.object(main.sys, 'stdin', input_lines()):
+            batch = threading.Thread(
+                target=main.run_batch, args=(['--concurrency', str(concurrency), '--output', self.output_path],))
+            batch.start()
+            try:
+                for _ in range(concurrency):
+                    self.assertTrue(started.acquire(timeout=5), "Workers should start generating.")
+                # Give the reader time to run ahead if it were not bounded
+                batch.join(0.2)
+                # One extra line is read before the reader waits for an in-flight item to finish
+                self.assertEqual(len(lines_read), concurrency * 2 + 1)
+            finally:
+                release.set()
+                batch.join(5)
+
+        with open(self.output_path) as output_file:
+            self.assertEqual(len(output_file.readlines()), 20)
+
+    def test_batch_profile(self):
+        """
+        Test that --profile writes cProfile statistics that pstats can load.
+        """
+        profile_path = os.path.join(self.temp_dir.name, 'batch.prof')
+
+        exit_code, _ = self.run_batch_lines(['"a cat"', '"a dog"'], '--profile', profile_path)
+
+        self.assertEqual(exit_code, 0)
+        stats = pstats.Stats(profile_path)
+        self.assertGreater(stats.total_calls, 0)
+
+    def test_batch_profile_concurrent(self):
+        """
+        Test that --profile with several workers does not change batch results.
+
+        Only one profiler may be active per process from Python 3.12, so overlapping
+        stages must not each enable their own.
+        """
+        profile_path = os.path.join(self.temp_dir.name, 'batch.prof')
+        lines = [json.dumps(f"prompt {number}") for number in range(8)]
+
+        def slow_generate(prompt):
+            # Keep each stage running long enough for workers to overlap
+            time.sleep(0.02)
+            return f"/images/{prompt}.jpeg"
+
+        self.generate_image.side_effect = slow_generate
+
+        exit_code, results = self.run_batch_lines(lines, '--concurrency', '2', '--profile', profile_path)
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual([result['status'] for result in results], ['ok'] * 8)
+        stats = pstats.Stats(profile_path)
+        self.assertGreater(stats.total_calls, 0)
+
+    def test_batch_tracemalloc_requires_single_worker(self):
+        """
+        Test that --tracemalloc is rejected with more than one worker, as overlapping stages
+        would reset each other's peak memory.
+        """
+        with self.assertRaises(SystemExit):
+            self.run_batch_lines(['"a cat"'], '--concurrency', '2', '--tracemalloc')
+        self.generate_image.assert_not_called()
+
+    def test_stage_profiler_peak_memory(self):
+        """
+        Test that memory a stage allocates and frees again is included in its peak memory.
+        """
+        profiler = StageProfiler(tracemalloc_top=5)
+        profiler.start()
+        try:
+            with profiler.stage('generate'):
+                buffer = bytearray(500 * 1024)
+                del buffer
+        finally:
+            profiler.finish(logger)
+
+        self.assertEqual(profiler.peak_memory['generate']['runs'], 1)
+        # Allow for small objects freed elsewhere in the process during the stage
+        self.assertGreaterEqual(profiler.peak_memory['generate']['max'], 480 * 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,15 @@
 """
 Utility module for processing images generated by the AI image generation service.
 This includes resizing, format conversion, and ensuring images meet app specifications.
+It also produces the small review thumbnails and paginated contact sheets used by the
+admin image approval queue.
 """
 
 # External dependencies
+import json  # built-in module - Write the contact sheet tile index.
+import os  # built-in module - Build output paths for thumbnails and contact sheets.
+import re  # built-in module - Recognise contact sheet pages left by earlier runs.
+
 # PIL (Pillow) library for image processing, version 8.2.0
 from PIL import Image  # Version 8.2.0
 
@@ -15,6 +21,43 @@ from .logger import setup_logger
 LOG_LEVEL = 'INFO'  # Default log level
 logger = setup_logger(LOG_LEVEL)
 
+# Maximum bounding box for review thumbnails shown in the admin approval queue.
+# Thumbnails keep the aspect ratio of the processed image.
+REVIEW_THUMBNAIL_SIZE = (160, 120)
+
+# JPEG quality used for review thumbnails and contact sheets.
+# These are only used for human review, so a lower quality keeps the files small.
+REVIEW_IMAGE_QUALITY = 70
+
+# Grid layout of each contact sheet page (columns x rows of thumbnail tiles).
+CONTACT_SHEET_COLUMNS = 5
+CONTACT_SHEET_ROWS = 4
+
+# Background colour for empty space around thumbnails on a contact sheet.
+CONTACT_SHEET_BACKGROUND = (255, 255, 255)
+
+# Colour of the placeholder tile drawn when a review thumbnail cannot be read.
+CONTACT_SHEET_PLACEHOLDER = (200, 200, 200)
+
+# Manifest listing the current contact sheet pages, loaded by the admin approval queue.
+CONTACT_SHEET_MANIFEST = 'contact_sheets.json'
+
+# File names of contact sheet pages and their tile indexes.
+_CONTACT_SHEET_PAGE = re.compile(r'^contact_sheet_(\d{4,})\.(jpeg|json)$')
+
+def review_thumbnail_path(processed_image_path):
+    """
+    Returns the path of the review thumbnail generated for a processed image.
+
+    Parameters:
+        processed_image_path (str): Path to the processed image, as returned by
+            process_image and generate_image.
+
+    Returns:
+        str: Path to the review thumbnail.
+    """
+    return f"{processed_image_path.rsplit('.', 1)[0]}_thumb.jpeg"
+
 def process_image(image_path):
     """
     Processes an image to ensure it meets the app's specifications,
@@ -36,7 +79,8 @@ def process_image(image_path):
     3. Resize the image to the required dimensions for the app.
     4. Convert the image to the appropriate format (e.g., JPEG).
     5. Save the processed image to a new file path.
-    6. Return the path to the processed image.
+    6. Save a review thumbnail from the same decoded image (see review_thumbnail_path).
+    7. Return the path to the processed image.
     """
     try:
         logger.info(f"Starting image processing for {image_path}")
@@ -70,9 +114,186 @@ def process_image(image_path):
             img.save(processed_image_path, required_format)
             logger.info(f"Processed image saved to {processed_image_path}")
 
+            # Save a review thumbnail from the already decoded and resized image,
+            # so the admin approval queue never has to load the full-size JPEG
+            save_review_thumbnail(img, processed_image_path)
+
         # Return the path to the processed image
         return processed_image_path
 
     except Exception as e:
         logger.error(f"Error processing image {image_path}: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+def save_review_thumbnail(img, processed_image_path):
+    """
+    Saves the review thumbnail for a processed image next to it.
+
+    The thumbnail is only used for human review, so failures are logged and never
+    fail the image processing pipeline.
+
+    Parameters:
+        img (PIL.Image.Image): The decoded, processed image.
+        processed_image_path (str): Path the processed image was saved to.
+
+    Returns:
+        str: Path to the review thumbnail, or None if it could not be saved.
+    """
+    thumbnail_path = review_thumbnail_path(processed_image_path)
+    try:
+        thumbnail = img.copy()
+        thumbnail.thumbnail(REVIEW_THUMBNAIL_SIZE, Image.ANTIALIAS)
+        thumbnail.save(thumbnail_path, 'JPEG', quality=REVIEW_IMAGE_QUALITY)
+        logger.debug(f"Review thumbnail saved to {thumbnail_path} with size {thumbnail.size}")
+        return thumbnail_path
+    except Exception as e:
+        logger.error(f"Error saving review thumbnail {thumbnail_path}: {str(e)}")
+        return None
+
+def build_contact_sheets(thumbnails, output_dir, columns=CONTACT_SHEET_COLUMNS, rows=CONTACT_SHEET_ROWS):
+    """
+    Builds paginated contact sheet mosaics from review thumbnails for the admin approval queue.
+
+    Each page is written as a JPEG mosaic ('contact_sheet_0001.jpeg', ...) together with a JSON
+    index ('contact_sheet_0001.json', ...) mapping every tile on the sheet to its image id, so a
+    review page only needs to load those two small files. A manifest ('contact_sheets.json')
+    lists the current pages, and pages left in output_dir by an earlier, longer run are removed.
+    Thumbnails that cannot be read are drawn as a placeholder tile marked as missing in the index.
+
+    Parameters:
+        thumbnails (iterable): (image_id, thumbnail_path) pairs, in display order.
+        output_dir (str): Directory where the contact sheets and indexes are written.
+        columns (int): Number of tile columns per contact sheet.
+        rows (int): Number of tile rows per contact sheet.
+
+    Returns:
+        list: One dict per page with the 'page' number, 'sheet_path' and 'index_path'.
+
+    Steps:
+    1. Group the thumbnails into pages of columns x rows tiles.
+    2. Paste each thumbnail centred in its tile on a blank sheet.
+    3. Save the sheet and its tile index to output_dir.
+    4. Write the manifest and remove pages left by earlier runs.
+    5. Return the list of written pages.
+    """
+    if columns < 1 or rows < 1:
+        raise ValueError("Contact sheets need at least one column and one row.")
+
+    tile_width, tile_height = REVIEW_THUMBNAIL_SIZE
+    tiles_per_page = columns * rows
+    os.makedirs(output_dir, exist_ok=True)
+
+    pages = []
+    page_tiles = []
+
+    def write_page():
+        page = len(pages) + 1
+        # The last page is only as tall as the rows it actually uses
+        used_rows = (len(page_tiles) + columns - 1) // columns
+        sheet = Image.new('RGB', (columns * tile_width, used_rows * tile_height), CONTACT_SHEET_BACKGROUND)
+        index = {
+            'page': page,
+            'columns': columns,
+            'rows': used_rows,
+            'tile_width': tile_width,
+            'tile_height': tile_height,
+            'tiles': [],
+        }
+
+        for position, (image_id, thumbnail_path) in enumerate(page_tiles):
+            row, column = divmod(position, columns)
+            tile = {'image_id': image_id, 'row': row, 'column': column}
+            try:
+                with Image.open(thumbnail_path) as thumb:
+                    # Thumbnails are normally already within the tile size, this only guards odd inputs
+                    thumb.thumbnail(REVIEW_THUMBNAIL_SIZE, Image.ANTIALIAS)
+                    if thumb.mode != 'RGB':
+                        thumb = thumb.convert('RGB')
+                    left = column * tile_width + (tile_width - thumb.width) // 2
+                    top = row * tile_height + (tile_height - thumb.height) // 2
+                    sheet.paste(thumb, (left, top))
+                    tile['box'] = [left, top, left + thumb.width, top + thumb.height]
+            except Exception as e:
+                # Review thumbnails are best effort (see save_review_thumbnail), so keep the tile
+                # and let reviewers fall back to the full image for it
+                logger.error(f"Error reading review thumbnail {thumbnail_path} for image {image_id}: {str(e)}")
+                box = [column * tile_width, row * tile_height, (column + 1) * tile_width, (row + 1) * tile_height]
+                sheet.paste(CONTACT_SHEET_PLACEHOLDER, box)
+                tile.update(box=box, missing=True)
+            index['tiles'].append(tile)
+
+        sheet_path = os.path.join(output_dir, f"contact_sheet_{page:04d}.jpeg")
+        index_path = os.path.join(output_dir, f"contact_sheet_{page:04d}.json")
+        sheet.save(sheet_path, 'JPEG', quality=REVIEW_IMAGE_QUALITY)
+        index['sheet'] = os.path.basename(sheet_path)
+        with open(index_path, 'w') as index_file:
+            json.dump(index, index_file)
+
+        logger.info(f"Contact sheet page {page} with {len(page_tiles)} tiles saved to {sheet_path}")
+        pages.append({'page': page, 'sheet_path': sheet_path, 'index_path': index_path, 'tiles': len(page_tiles)})
+
+    try:
+        # Thumbnails are consumed lazily so only one page is held in memory at a time
+        for image_id, thumbnail_path in thumbnails:
+            page_tiles.append((image_id, thumbnail_path))
+            if len(page_tiles) == tiles_per_page:
+                write_page()
+                page_tiles.clear()
+
+        if page_tiles:
+            write_page()
+
+        write_contact_sheet_manifest(pages, output_dir, columns, rows)
+        return pages
+
+    except Exception as e:
+        logger.error(f"Error building contact sheets in {output_dir}: {str(e)}")
+        raise
+
+
+def write_contact_sheet_manifest(pages, output_dir, columns, rows):
+    """
+    Writes the contact sheet manifest and removes pages left by an earlier, longer run.
+
+    The manifest is replaced atomically, so the admin approval queue never reads a
+    partially written page list.
+
+    Parameters:
+        pages (list): Pages written by build_contact_sheets.
+        output_dir (str): Directory holding the contact sheets.
+        columns (int): Number of tile columns per contact sheet.
+        rows (int): Number of tile rows per contact sheet.
+
+    Returns:
+        str: Path to the manifest.
+    """
+    manifest = {
+        'columns': columns,
+        'rows': rows,
+        'tile_width': REVIEW_THUMBNAIL_SIZE[0],
+        'tile_height': REVIEW_THUMBNAIL_SIZE[1],
+        'pages': [
+            {
+                'page': page['page'],
+                'sheet': os.path.basename(page['sheet_path']),
+                'index': os.path.basename(page['index_path']),
+                'tiles': page['tiles'],
+            }
+            for page in pages
+        ],
+    }
+    manifest_path = os.path.join(output_dir, CONTACT_SHEET_MANIFEST)
+    temporary_path = f"{manifest_path}.tmp"
+    with open(temporary_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(temporary_path, manifest_path)
+
+    # Stale pages would still map tiles to the image ids of the earlier run
+    for file_name in os.listdir(output_dir):
+        match = _CONTACT_SHEET_PAGE.match(file_name)
+        if match and int(match.group(1)) > len(pages):
+            os.remove(os.path.join(output_dir, file_name))
+            logger.debug(f"Removed stale contact sheet file {file_name}")
+
+    logger.info(f"Contact sheet manifest with {len(pages)} page(s) saved to {manifest_path}")
+    return manifest_path
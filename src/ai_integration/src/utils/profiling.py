@@ -0,0 +1,144 @@
+"""
+Utility module providing opt-in profiling hooks for the AI image pipeline.
+
+Collects cProfile statistics, peak traced memory and the sites of net retained memory
+growth per pipeline stage so hot spots can be found on real production batches without
+editing the pipeline code.
+"""
+
+# External dependencies
+import cProfile  # built-in module - Deterministic CPU profiling of pipeline stages.
+import pstats  # built-in module - Aggregate and dump cProfile statistics.
+import threading  # built-in module - Guard shared statistics across worker threads.
+import tracemalloc  # built-in module - Trace memory use per stage.
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+# Allocations made by tracemalloc, this module and the stage context manager are not reported.
+_TRACEMALLOC_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, '*/contextlib.py'),
+)
+
+class StageProfiler:
+    """
+    Records CPU and memory profiles for named pipeline stages.
+
+    Both hooks are opt-in and cost nothing when disabled. Statistics from every worker
+    thread are merged into a single profile, which is written in the standard pstats
+    format so it can be turned into a flamegraph (e.g. with flameprof or snakeviz).
+    Only one profiler may be active per process (enforced from Python 3.12), so while
+    cProfile is enabled profiled stages run one at a time; results are unchanged, only
+    throughput is reduced.
+
+    Memory profiling records, per stage, the peak traced memory above the memory in use
+    when the stage started (which includes memory the stage allocates and frees again),
+    and the source lines of net retained growth (memory still held when the stage ends).
+
+    Note:
+        tracemalloc traces the whole process, so both figures are only exact when stages
+        do not overlap with other work. The batch CLI therefore only allows memory
+        profiling with a concurrency of 1.
+    """
+
+    def __init__(self, profile_path=None, tracemalloc_top=0):
+        """
+        Parameters:
+            profile_path (str): File to write cProfile statistics to, or None to disable.
+            tracemalloc_top (int): Number of net retained growth sites to report per stage,
+                or 0 to disable memory profiling.
+        """
+        self.profile_path = profile_path
+        self.tracemalloc_top = tracemalloc_top
+        self._lock = threading.Lock()
+        self._stage_lock = threading.Lock()
+        self._stats = None
+        # Per stage: number of runs, largest and total peak memory above stage entry (bytes)
+        self.peak_memory = defaultdict(lambda: {'runs': 0, 'max': 0, 'total': 0})
+        self._retained_growth = defaultdict(Counter)
+
+    def start(self):
+        """Starts process-wide tracing if memory profiling is enabled."""
+        if self.tracemalloc_top and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Profiles the enclosed block as one run of the given pipeline stage.
+
+        Parameters:
+            name (str): Name of the pipeline stage (e.g. 'generate').
+        """
+        with self._stage_lock if self.profile_path else nullcontext():
+            with self._profile_stage(name):
+                yield
+
+    @contextmanager
+    def _profile_stage(self, name):
+        profiler = cProfile.Profile() if self.profile_path else None
+        before = None
+
+        if self.tracemalloc_top:
+            # Take the snapshot before measuring so its own allocations are not part of the peak
+            before = self._snapshot()
+            entry_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+            if before is not None:
+                # Another thread freeing memory during the stage can push the peak below entry
+                peak = max(0, tracemalloc.get_traced_memory()[1] - entry_memory)
+                # Only keep the per-line size difference so memory use does not grow with the batch
+                differences = self._snapshot().compare_to(before, 'lineno')
+
+            with self._lock:
+                if profiler:
+                    if self._stats is None:
+                        self._stats = pstats.Stats(profiler)
+                    else:
+                        self._stats.add(profiler)
+                if before is not None:
+                    stage_peak = self.peak_memory[name]
+                    stage_peak['runs'] += 1
+                    stage_peak['max'] = max(stage_peak['max'], peak)
+                    stage_peak['total'] += peak
+                    for difference in differences:
+                        if difference.size_diff > 0:
+                            self._retained_growth[name][str(difference.traceback)] += difference.size_diff
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces(_TRACEMALLOC_FILTERS)
+
+    def finish(self, logger):
+        """
+        Stops tracing, writes the cProfile output and logs the memory profile per stage.
+
+        Parameters:
+            logger (logging.Logger): Logger used to report profiling results.
+        """
+        if self.profile_path:
+            if self._stats is None:
+                logger.warning("No pipeline stages ran; no profile was written.")
+            else:
+                self._stats.dump_stats(self.profile_path)
+                logger.info(f"cProfile statistics written to {self.profile_path}")
+
+        if self.tracemalloc_top:
+            tracemalloc.stop()
+            for name, stage_peak in self.peak_memory.items():
+                logger.info(
+                    f"Peak memory for stage '{name}' over {stage_peak['runs']} run(s): "
+                    f"max {stage_peak['max'] / 1024:.1f} KiB, "
+                    f"mean {stage_peak['total'] / stage_peak['runs'] / 1024:.1f} KiB above stage entry")
+                logger.info(f"Top {self.tracemalloc_top} sites of net retained growth for stage '{name}':")
+                for site, size in self._retained_growth[name].most_common(self.tracemalloc_top):
+                    logger.info(f"  {site}: {size / 1024:.1f} KiB")